@@ -0,0 +1,139 @@
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+
+GITHUB_API_URL = "https://api.github.com"
+
+# MCP tool -> (REST path template, {MCP argument: REST query param}).
+# Path arguments are filled from the template; any argument not listed here
+# means the MCP call can't be mirrored exactly, so no conditional request.
+_REST_EQUIVALENTS: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "list_commits": (
+        "/repos/{owner}/{repo}/commits",
+        {"sha": "sha", "author": "author", "perPage": "per_page", "page": "page"},
+    ),
+    "list_issues": (
+        "/repos/{owner}/{repo}/issues",
+        {
+            "state": "state",
+            "labels": "labels",
+            "direction": "direction",
+            "since": "since",
+            "perPage": "per_page",
+            "page": "page",
+        },
+    ),
+    "list_pull_requests": (
+        "/repos/{owner}/{repo}/pulls",
+        {
+            "state": "state",
+            "head": "head",
+            "base": "base",
+            "sort": "sort",
+            "direction": "direction",
+            "perPage": "per_page",
+            "page": "page",
+        },
+    ),
+    "get_pull_request": ("/repos/{owner}/{repo}/pulls/{pullNumber}", {}),
+}
+_PATH_ARGS = ("owner", "repo", "pullNumber")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def rest_request_for(
+    tool_name: str, arguments: Optional[Dict[str, Any]]
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Map an MCP tool call onto the equivalent GitHub REST GET, if there is one.
+
+    Returns (path, query params), or None when the call has no exact REST
+    equivalent.
+    """
+    if tool_name not in _REST_EQUIVALENTS:
+        return None
+
+    path_template, query_map = _REST_EQUIVALENTS[tool_name]
+    arguments = arguments or {}
+
+    params: Dict[str, Any] = {}
+    for name, value in arguments.items():
+        if name in _PATH_ARGS:
+            continue
+        if name not in query_map:
+            return None
+        if isinstance(value, list):
+            value = ",".join(str(item) for item in value)
+        params[query_map[name]] = value
+
+    try:
+        path = path_template.format(**arguments)
+    except KeyError:
+        return None
+    return path, params
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Imported here: github_mcp imports this module.
+    from .github_mcp import _get_github_pat
+
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            headers={
+                "Authorization": f"Bearer {_get_github_pat()}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=15,
+        )
+    return _client
+
+
+async def _gh_get(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    etag: Optional[str] = None,
+) -> Tuple[int, Optional[str]]:
+    """
+    GET a GitHub REST resource, conditionally if `etag` is given.
+
+    Returns (status, etag). Only the ETag is wanted (the agent gets its data
+    over MCP), so the body is never decoded. A 304 Not Modified isn't
+    counted against GitHub's rate limit.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    resp = await _get_client().get(path, params=params, headers=headers)
+
+    if resp.status_code == 304:
+        return 304, resp.headers.get("ETag", etag)
+
+    resp.raise_for_status()
+    return resp.status_code, resp.headers.get("ETag")
+
+
+async def fetch_etag(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    etag: Optional[str] = None,
+) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Best-effort wrapper around _gh_get for cache revalidation.
+
+    Returns (status, etag), or (None, None) if GitHub couldn't be reached;
+    callers then fall back to a normal MCP call.
+    """
+    try:
+        return await _gh_get(path, params, etag)
+    except httpx.HTTPError:
+        return None, None
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
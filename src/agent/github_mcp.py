@@ -1,12 +1,65 @@
+import abc
+import asyncio
+import hashlib
+import json
+import math
 import os
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Tuple
 
+import anyio
+import httpx
 from agents.mcp import MCPServerStreamableHttp
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult
+
+from . import github_http
+from .rate_limit import TokenBucket
 
 
 GITHUB_MCP_URL = "https://api.githubcopilot.com/mcp/"
 
+# Per-tool TTLs (seconds) for cached MCP tool results.
+# Any other read-only tool (get_* / list_* / search_*) falls back to
+# GITHUB_MCP_CACHE_TTL; set that env var to 0 to disable caching entirely.
+TOOL_CACHE_TTLS: Dict[str, float] = {
+    "list_commits": 120,
+    "get_pull_request": 60,
+    "list_issues": 120,
+}
+DEFAULT_TOOL_CACHE_TTL = 60
+TOOL_CACHE_MAX_ENTRIES = 256
+READ_ONLY_TOOL_PREFIXES = ("get_", "list_", "search_")
+
+# Upper bound on concurrent tool calls per server.
+TOOL_CALL_CONCURRENCY = 8
+
+# Process-wide budget for tool calls that actually reach GitHub (cache
+# misses), to stay clear of GitHub's secondary rate limits under bursts.
+_GH_BUCKET = TokenBucket(float(os.getenv("GITHUB_MCP_RATE_PER_MIN", "80")))
+
+# Transport errors meaning the MCP session itself is gone. Other McpErrors
+# (JSON-RPC error replies, the per-request timeout) only fail that one call.
+SESSION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    httpx.TransportError,
+)
+
+# A replaced connection stays open this long for requests still using it.
+RETIRE_GRACE_SECONDS = 300
+
+
+def _is_session_error(exc: BaseException) -> bool:
+    if isinstance(exc, SESSION_ERRORS):
+        return True
+    # The Streamable HTTP client reports a session GitHub has expired
+    # (HTTP 404 on the session id) as this specific McpError.
+    return isinstance(exc, McpError) and exc.error.message == "Session terminated"
+
+
 
 def _get_github_pat() -> str:
     token = os.getenv("GITHUB_MCP_PAT")
@@ -18,16 +71,310 @@ def _get_github_pat() -> str:
     return token
 
 
-@asynccontextmanager
-async def github_mcp_server() -> AsyncIterator[MCPServerStreamableHttp]:
+def _default_cache_ttl() -> float:
+    return float(os.getenv("GITHUB_MCP_CACHE_TTL", DEFAULT_TOOL_CACHE_TTL))
+
+
+def _tool_cache_ttl(tool_name: str) -> float:
     """
-    Context manager that yields a configured MCP server instance for GitHub.
+    TTL for a tool's results, or 0 if the tool should not be cached.
+    """
+    default_ttl = _default_cache_ttl()
+    if default_ttl <= 0:
+        return 0
+    if tool_name in TOOL_CACHE_TTLS:
+        return TOOL_CACHE_TTLS[tool_name]
+    if tool_name.startswith(READ_ONLY_TOOL_PREFIXES):
+        return default_ttl
+    return 0
 
-    Uses Streamable HTTP transport to connect to the hosted GitHub MCP server.
+
+# Entries for tools with a REST equivalent are kept this many TTLs past
+# expiry so they can be revalidated with a conditional request instead of
+# refetched.
+STALE_RETENTION_FACTOR = 10
+
+
+class CachedToolResult(NamedTuple):
+    result: CallToolResult
+    etag: Optional[str]
+    fresh: bool
+
+
+class ToolCache(abc.ABC):
+    """
+    Backend interface for cached MCP tool results.
+
+    `args_json` is the tool arguments serialized with sorted keys. Entries
+    stop being fresh after `ttl`; ones set with `keep_stale` linger (stale)
+    so they can be revalidated against GitHub.
+    """
+
+    @abc.abstractmethod
+    async def get(self, tool_name: str, args_json: str) -> Optional[CachedToolResult]:
+        pass
+
+    @abc.abstractmethod
+    async def set(
+        self,
+        tool_name: str,
+        args_json: str,
+        result: CallToolResult,
+        ttl: float,
+        etag: Optional[str] = None,
+        keep_stale: bool = False,
+    ) -> None:
+        pass
+
+
+def _retention(ttl: float, keep_stale: bool) -> float:
+    return ttl * STALE_RETENTION_FACTOR if keep_stale else ttl
+
+
+class InProcLRU(ToolCache):
+    """
+    Per-process LRU with per-entry expiry (the default backend).
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, float, CallToolResult, Optional[str]]]" = (
+            OrderedDict()
+        )
+
+    async def get(self, tool_name: str, args_json: str) -> Optional[CachedToolResult]:
+        key = (tool_name, args_json)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        fresh_until, keep_until, result, etag = entry
+        now = time.monotonic()
+        if keep_until <= now:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return CachedToolResult(result, etag, fresh=fresh_until > now)
+
+    async def set(
+        self,
+        tool_name: str,
+        args_json: str,
+        result: CallToolResult,
+        ttl: float,
+        etag: Optional[str] = None,
+        keep_stale: bool = False,
+    ) -> None:
+        key = (tool_name, args_json)
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, now + _retention(ttl, keep_stale), result, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCache(ToolCache):
+    """
+    Redis-backed cache shared by every worker process (`uvicorn --workers N`).
+
+    Entries are stored as msgpack under `gh_mcp:v1:{tool}:{sha1(args)}`
+    with a Redis EXPIRE of the tool's TTL (longer for entries kept for
+    revalidation). Redis errors, and entries that can't be decoded (corrupt,
+    or written by an older schema), are treated as cache misses so the cache
+    never fails a request.
+
+    Requires the optional `redis` and `msgpack` packages.
     """
+
+    def __init__(self, url: str) -> None:
+        try:
+            import msgpack
+            import redis.asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as exc:
+            raise RuntimeError(
+                "GITHUB_MCP_CACHE_BACKEND points at Redis, but the `redis` and "
+                "`msgpack` packages are not installed. "
+                "Install them with `pip install redis msgpack`."
+            ) from exc
+
+        self._msgpack = msgpack
+        self._redis_error = RedisError
+        self._redis = redis.from_url(url)
+
+    @staticmethod
+    def _key(tool_name: str, args_json: str) -> str:
+        digest = hashlib.sha1(args_json.encode()).hexdigest()
+        return f"gh_mcp:v1:{tool_name}:{digest}"
+
+    async def get(self, tool_name: str, args_json: str) -> Optional[CachedToolResult]:
+        try:
+            raw = await self._redis.get(self._key(tool_name, args_json))
+        except self._redis_error:
+            return None
+        if raw is None:
+            return None
+
+        try:
+            entry = self._msgpack.unpackb(raw)
+            return CachedToolResult(
+                CallToolResult.model_validate(entry["result"]),
+                entry["etag"],
+                # Wall clock, since entries are shared across processes.
+                fresh=entry["fresh_until"] > time.time(),
+            )
+        except (ValueError, KeyError, TypeError):
+            # msgpack decode errors and pydantic's ValidationError are
+            # ValueErrors; the next set() overwrites the bad entry.
+            return None
+
+    async def set(
+        self,
+        tool_name: str,
+        args_json: str,
+        result: CallToolResult,
+        ttl: float,
+        etag: Optional[str] = None,
+        keep_stale: bool = False,
+    ) -> None:
+        packed = self._msgpack.packb(
+            {
+                "result": result.model_dump(mode="json", by_alias=True),
+                "etag": etag,
+                "fresh_until": time.time() + ttl,
+            }
+        )
+        try:
+            await self._redis.set(
+                self._key(tool_name, args_json),
+                packed,
+                ex=math.ceil(_retention(ttl, keep_stale)),
+            )
+        except self._redis_error:
+            pass
+
+
+def _make_tool_cache() -> ToolCache:
+    """
+    Pick the backend from GITHUB_MCP_CACHE_BACKEND: unset / "memory" for the
+    in-process LRU, or a redis:// / rediss:// URL for a shared Redis.
+    """
+    backend = os.getenv("GITHUB_MCP_CACHE_BACKEND", "memory")
+    if backend.startswith(("redis://", "rediss://")):
+        return RedisCache(backend)
+    return InProcLRU()
+
+
+# Module-global so it survives across `async with github_mcp_server()`
+# re-entries (e.g. activity + investigation inside one daily report).
+_TOOL_CACHE: ToolCache = _make_tool_cache()
+
+
+class CachingMCPServerStreamableHttp(MCPServerStreamableHttp):
+    """
+    MCPServerStreamableHttp that memoizes read-only tool results for a
+    short TTL, keyed by (tool name, sorted JSON args). The cache lives in
+    process by default, or in Redis (see _make_tool_cache). Expired entries
+    for tools with a REST equivalent are revalidated with ETags first.
+
+    Upstream cost per read of such a tool: a cold miss is one MCP call. The
+    first expiry is one MCP call plus one REST GET, which fetches the ETag.
+    Later expiries are one conditional GET (a 304 is free against the rate
+    limit), plus an MCP call only if the data changed. Both kinds of request
+    draw from the same token bucket.
+
+    Cuts duplicate GitHub round-trips when several agents look at the
+    same repo/branch within a few minutes of each other.
+
+    Tool calls that reach GitHub are bounded by a per-server semaphore, so
+    agents can fan out independent calls without flooding the MCP server.
+
+    A call failing because the session is gone (see _is_session_error)
+    marks the server `broken`, so SharedGitHubMCPServer.acquire() replaces
+    it for the next request.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._tool_semaphore = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+        self.broken = False
+
+    async def _call_tool_uncached(
+        self, tool_name: str, arguments: Optional[Dict[str, Any]]
+    ) -> CallToolResult:
+        async with self._tool_semaphore:
+            await _GH_BUCKET.acquire()
+            try:
+                return await super().call_tool(tool_name, arguments)
+            except Exception as exc:
+                if _is_session_error(exc):
+                    self.broken = True
+                raise
+
+    async def _fetch_etag(
+        self, rest_request: Tuple[str, Dict[str, Any]], etag: Optional[str] = None
+    ) -> Tuple[Optional[int], Optional[str]]:
+        # REST requests reach GitHub too, so they share the same budget.
+        async with self._tool_semaphore:
+            await _GH_BUCKET.acquire()
+            return await github_http.fetch_etag(*rest_request, etag=etag)
+
+    async def call_tool(
+        self, tool_name: str, arguments: Optional[Dict[str, Any]]
+    ) -> CallToolResult:
+        ttl = _tool_cache_ttl(tool_name)
+        if ttl <= 0:
+            return await self._call_tool_uncached(tool_name, arguments)
+
+        args_json = json.dumps(arguments or {}, sort_keys=True)
+        cached = await _TOOL_CACHE.get(tool_name, args_json)
+        if cached is not None and cached.fresh:
+            return cached.result
+
+        rest_request = github_http.rest_request_for(tool_name, arguments)
+
+        if rest_request is None or cached is None:
+            # Cold miss: don't spend a REST GET on an entry that may never be
+            # read again after it expires; its ETag is fetched lazily below.
+            result = await self._call_tool_uncached(tool_name, arguments)
+            etag = None
+        elif cached.etag:
+            # Stale but revalidatable: a 304 costs no rate limit and no MCP
+            # call. Otherwise the revalidation response's ETag is the new one.
+            status, etag = await self._fetch_etag(rest_request, cached.etag)
+            if status == 304:
+                await _TOOL_CACHE.set(
+                    tool_name, args_json, cached.result, ttl, etag, keep_stale=True
+                )
+                return cached.result
+            result = await self._call_tool_uncached(tool_name, arguments)
+        else:
+            # First expiry of a kept entry: grab the ETag alongside the MCP
+            # call so later refreshes can be conditional.
+            result, (_, etag) = await asyncio.gather(
+                self._call_tool_uncached(tool_name, arguments),
+                self._fetch_etag(rest_request),
+            )
+
+        # Don't pin failures (auth hiccups, rate limits) for the whole TTL.
+        if not result.isError:
+            await _TOOL_CACHE.set(
+                tool_name,
+                args_json,
+                result,
+                ttl,
+                etag,
+                keep_stale=rest_request is not None,
+            )
+
+        return result
+
+
+def _build_server() -> CachingMCPServerStreamableHttp:
     token = _get_github_pat()
 
-    server = MCPServerStreamableHttp(
+    return CachingMCPServerStreamableHttp(
         name="github",
         params={
             "url": GITHUB_MCP_URL,
@@ -41,5 +388,138 @@ async def github_mcp_server() -> AsyncIterator[MCPServerStreamableHttp]:
         max_retry_attempts=3,
     )
 
-    async with server:
-        yield server
\ No newline at end of file
+
+@asynccontextmanager
+async def github_mcp_server() -> AsyncIterator[MCPServerStreamableHttp]:
+    """
+    Context manager that yields a configured MCP server instance for GitHub.
+
+    Uses Streamable HTTP transport to connect to the hosted GitHub MCP server.
+    Tool results are cached briefly (see CachingMCPServerStreamableHttp).
+    """
+    async with _build_server() as server:
+        yield server
+
+
+class SharedGitHubMCPServer:
+    """
+    One long-lived GitHub MCP connection shared by every API request.
+
+    Enter it once (e.g. in the FastAPI lifespan) and call `acquire()` per
+    request. If the session has dropped (its holder task ended, or a tool
+    call hit a session/transport error), `acquire()` reconnects under a lock
+    so concurrent requests don't race to rebuild it.
+
+    Each connection is owned by a dedicated background task: the Streamable
+    HTTP client uses anyio cancel scopes, so connect() and cleanup() must
+    run in the same task even when a reconnect is triggered by a request.
+
+    A replaced connection is not closed under the requests still using it:
+    it is retired, and only released after RETIRE_GRACE_SECONDS.
+    """
+
+    def __init__(self) -> None:
+        self._server: Optional[CachingMCPServerStreamableHttp] = None
+        self._holder: Optional[asyncio.Task] = None
+        self._release: Optional[asyncio.Event] = None
+        self._retiring: "set[asyncio.Task]" = set()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "SharedGitHubMCPServer":
+        async with self._lock:
+            await self._connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        async with self._lock:
+            await self._close()
+            # Shutting down: release retired connections now.
+            retiring, self._retiring = self._retiring, set()
+            for task in retiring:
+                task.cancel()
+            await asyncio.gather(*retiring, return_exceptions=True)
+
+    @staticmethod
+    async def _hold(ready: asyncio.Future, release: asyncio.Event) -> None:
+        try:
+            server = _build_server()
+            await server.connect()
+        except BaseException as exc:
+            # Always resolve `ready` (e.g. GITHUB_MCP_PAT unset), or
+            # _connect(), and with it app startup, would wait forever.
+            if isinstance(exc, asyncio.CancelledError):
+                ready.cancel()
+            else:
+                ready.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+
+        ready.set_result(server)
+        try:
+            await release.wait()
+        finally:
+            await server.cleanup()
+
+    async def _connect(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._release = asyncio.Event()
+        self._holder = asyncio.create_task(self._hold(ready, self._release))
+        self._server = await ready
+
+    async def _close(self) -> None:
+        holder, self._holder = self._holder, None
+        self._server = None
+        if holder is None:
+            return
+        self._release.set()
+        try:
+            await holder
+        except Exception:
+            # The old session is already broken; nothing useful to report.
+            pass
+
+    @staticmethod
+    async def _release_later(holder: asyncio.Task, release: asyncio.Event) -> None:
+        try:
+            if not holder.done():
+                await asyncio.sleep(RETIRE_GRACE_SECONDS)
+        finally:
+            release.set()
+            try:
+                await holder
+            except Exception:
+                pass
+
+    def _retire(self) -> None:
+        holder, self._holder = self._holder, None
+        self._server = None
+        if holder is None:
+            return
+        task = asyncio.create_task(self._release_later(holder, self._release))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    def _is_healthy(self) -> bool:
+        return (
+            self._server is not None
+            and self._server.session is not None
+            and not self._server.broken
+            and self._holder is not None
+            and not self._holder.done()
+        )
+
+    async def acquire(self) -> MCPServerStreamableHttp:
+        """
+        Return the shared server, reconnecting first if the session is gone.
+        """
+        if self._is_healthy():
+            return self._server
+
+        async with self._lock:
+            if not self._is_healthy():
+                # Requests already holding the old server keep it until
+                # they finish; new ones get the fresh connection.
+                self._retire()
+                await self._connect()
+            return self._server
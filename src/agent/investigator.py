@@ -1,122 +1,116 @@
+import asyncio
+import functools
+import json
+import time
+from contextlib import asynccontextmanager
+from string import Template
 from textwrap import dedent
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 from agents import Agent, Runner
 from agents.model_settings import ModelSettings
 from agents.exceptions import MaxTurnsExceeded
+from agents.mcp import MCPServer
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import BaseModel
 
 from .github_mcp import github_mcp_server
 from ..models.error_payload import ErrorInvestigationRequest
 from ..models.repo_activity_payload import RepoActivityRequest
 from ..models.daily_report_payload import DailyReportRequest
 from ..models.pr_risk_payload import PRRiskRequest
+from ..models.batch_payload import BatchJob
 
 
-def build_instructions() -> str:
-    return dedent(
-        """
-        You are a senior DevOps + data engineering assistant.
-
-        Your job:
-        - Use the GitHub MCP tools to investigate build / pipeline errors.
-        - You receive: an error message, GitHub repo slug, branch, optional run id, and optional file path.
-        - You must:
-          1. Inspect recent workflow runs and logs related to this error.
-          2. Look at recent commits touching relevant files/components.
-          3. Correlate the error message with code or config changes.
-          4. Produce a concise root cause hypothesis + recommended fix.
-          5. Additionally, provide a brief review of recent repo activity
-             (recent commits, open pull requests, and recent issues) and
-             highlight anything that might be related to the error.
-
-        When using tools:
-        - Prefer read-only operations (list workflow runs, view logs, list commits, diff commits, read files, list PRs/issues).
-        - Avoid write actions (creating issues, comments, etc.) unless explicitly requested,
-          which we are NOT doing in this project.
-
-        Output:
-        - Short summary (2–3 sentences).
-        - Bullet list:
-          - Likely cause(s)
-          - Evidence (link / file / commit references)
-          - Recommended fix steps
-        - A separate section that summarizes recent repo activity.
-
-        Keep explanations concrete and tied to specific commits, files, workflows,
-        and pull requests whenever possible.
+# System prompts are a shared preamble plus a short per-agent delta. The
+# detailed output layout lives in each user prompt, so it isn't repeated here.
+_COMMON_PREAMBLE = dedent(
+    """
+    You are a senior DevOps + repository insights assistant with GitHub MCP tools.
+
+    Tools:
+    - Read-only only: workflow runs, logs, commits, diffs, files, PRs, issues.
+    - Never write (no issues, comments, reviews, etc.).
+    - You MAY request multiple independent tools in one turn (e.g. list
+      commits, PRs, and issues together) instead of one per turn.
+
+    Output:
+    - Markdown, following the section layout given in the request.
+    - Concrete and high signal: cite commit SHAs, PR / issue numbers,
+      file paths, and workflow names.
+    """
+).strip()
+
+_PR_RISK_SIGNALS = dedent(
+    """
+    PR risk signals:
+    - Large diff (many files / lines changed).
+    - Critical areas touched (core services, pipelines, infra, security).
+    - Dependency, environment, config, or CI/workflow changes.
+    - Migrations, refactors, or breaking changes.
+    - Missing or modified tests.
+    - Related failing builds or issues.
+    """
+).strip()
+
+_ROLE_DELTA = {
+    "error": dedent(
+        """
+        Task: investigate a build / pipeline error. Correlate it with recent
+        workflow runs, logs, and commits touching related files; give a root
+        cause hypothesis and recommended fix, and briefly review recent
+        commits / PRs / issues that may be related.
+        """
+    ).strip(),
+    "activity": dedent(
+        """
+        Task: summarize recent commits, open PRs, and issues for a repo/branch.
+        Highlight themes and anything risky, and name the top 3 risky PRs.
         """
     ).strip()
-
-def build_activity_instructions() -> str:
-    return dedent(
-        """
-        You are a senior DevOps + repository insights assistant.
-
-        Your job:
-        - Use the GitHub MCP tools to summarize recent activity for a given repo and branch.
-        - You should:
-          1. Look at the most recent commits on the branch.
-          2. Look at recent open pull requests targeting this branch.
-          3. Look at recent issues that may be associated with this repo.
-          4. Highlight themes and anything that looks risky or noteworthy
-             (e.g., big refactors, dependency changes, failing builds).
-          5. Identify the **top 3 risky pull requests** and explain why they are risky.
-
-        When using tools:
-        - Prefer read-only operations (list commits, list PRs, list issues, read files).
-        - Avoid write actions (creating issues, comments, etc.).
-
-        How to judge PR risk:
-        - Large number of changed files or lines.
-        - Touches critical or core directories (e.g., services, pipelines, infra).
-        - Modifies dependencies (requirements, package files, Dockerfiles).
-        - Modifies CI/CD or workflow definitions.
-        - Mentions breaking changes, migrations, or refactors in the title/description.
-        - Associated with recent failing builds or issues.
-
-        Output:
-        - A concise but informative summary in Markdown:
-          - Recent commit activity (what's being worked on, by whom).
-          - Recent PR activity (major changes, refactors, dependency bumps).
-          - Recent issues (bugs, performance problems, tech debt).
-          - **A dedicated section listing the top 3 risky PRs and why they are risky.**
-
-        Keep it high signal and concrete, with references to commit SHAs and PR numbers.
+    + "\n\n"
+    + _PR_RISK_SIGNALS,
+    "pr_risk": dedent(
+        """
+        Task: assess how risky a single pull request is to merge (metadata,
+        diff, affected areas, tests, related runs / issues) and rate it
+        Low / Medium / High with suggested pre-merge checks.
         """
     ).strip()
+    + "\n\n"
+    + _PR_RISK_SIGNALS,
+}
+
+
+@functools.cache
+def _instructions(kind: str) -> str:
+    return _COMMON_PREAMBLE + "\n\n" + _ROLE_DELTA[kind]
+
+
+def build_instructions() -> str:
+    return _instructions("error")
+
+
+def build_activity_instructions() -> str:
+    return _instructions("activity")
+
 
 def build_pr_risk_instructions() -> str:
-    return dedent(
-        """
-        You are a senior reviewer and production-readiness advisor.
-
-        Your job:
-        - Use the GitHub MCP tools to deeply analyze the risk profile of a given pull request.
-        - You should:
-          1. Fetch the pull request details (title, description, author, labels, status).
-          2. Inspect the diff: files changed, lines added/removed, key directories touched.
-          3. Look at related workflow runs for this PR (if available).
-          4. Look for linked issues, references, or related PRs.
-          5. Evaluate how risky this PR is to merge and why.
-
-        How to judge risk:
-        - Size and complexity of the diff.
-        - Criticality of the areas touched (core services, infra, pipelines, security).
-        - Changes to dependencies, environment, workflows, or configuration.
-        - Presence of migrations, refactors, or breaking changes.
-        - Test coverage (new tests added? existing tests modified?).
-        - History of failures in related areas.
-
-        Output:
-        - A Markdown report with:
-          - Overall risk rating (e.g., Low / Medium / High).
-          - Clear reasons for the rating.
-          - Specific files / components of concern.
-          - Suggested checks before merge (tests, reviewers, rollout plan).
-
-        Keep it concise but concrete and actionable.
-        """
-    ).strip()
+    return _instructions("pr_risk")
+
+
+@asynccontextmanager
+async def _mcp_session(server: Optional[MCPServer] = None) -> AsyncIterator[MCPServer]:
+    """
+    Yield `server` if the caller already holds a connection (e.g. the API's
+    shared one); otherwise open a fresh GitHub MCP connection for this call.
+    """
+    if server is not None:
+        yield server
+        return
+
+    async with github_mcp_server() as fresh_server:
+        yield fresh_server
 
 
 def create_pr_risk_agent(server) -> Agent:
@@ -130,6 +124,7 @@ def create_pr_risk_agent(server) -> Agent:
         mcp_servers=[server],
         model_settings=ModelSettings(
             tool_choice="auto",
+            parallel_tool_calls=True,
             temperature=0.25,
         ),
     )
@@ -146,6 +141,7 @@ def create_repo_activity_agent(server) -> Agent:
         mcp_servers=[server],
         model_settings=ModelSettings(
             tool_choice="auto",
+            parallel_tool_calls=True,
             temperature=0.3,
         ),
     )
@@ -163,41 +159,132 @@ def create_error_investigator_agent(server) -> Agent:
         mcp_servers=[server],
         model_settings=ModelSettings(
             tool_choice="auto",
+            parallel_tool_calls=True,
             temperature=0.2,
         ),
     )
 
 
-async def investigate_error(payload: ErrorInvestigationRequest) -> Dict[str, Any]:
+_AGENT_FACTORIES = {
+    "error": create_error_investigator_agent,
+    "activity": create_repo_activity_agent,
+    "pr_risk": create_pr_risk_agent,
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _agent_for(server: MCPServer, kind: str) -> Agent:
     """
-    High-level orchestration:
+    Reuse one Agent per (server, kind) instead of rebuilding it per request.
 
-    - Spins up MCP connection to GitHub
-    - Runs the agent with a rich prompt composed from payload
-    - Returns a dict ready to JSONify from FastAPI
+    Server objects hash by identity, so a reconnect (new server instance)
+    naturally gets fresh agents wired to the new connection.
+    """
+    return _AGENT_FACTORIES[kind](server)
 
-    Includes defensive handling around MaxTurnsExceeded so the API
-    returns a friendly message instead of a 500.
+
+# Upper bound on agent turns. Smaller requests get a budget sized to their
+# workload (see *_turns below) so a stuck run fails fast instead of burning
+# all 20 turns before the MaxTurnsExceeded fallback.
+MAX_TURNS = 20
+
+
+def _investigation_turns(payload: ErrorInvestigationRequest) -> int:
+    return min(
+        MAX_TURNS,
+        4 + payload.max_runs_to_check + (1 if payload.file_path else 0),
+    )
+
+
+def _activity_turns(payload: RepoActivityRequest) -> int:
+    return min(
+        MAX_TURNS,
+        3 + (payload.max_commits + payload.max_prs + payload.max_issues) // 5,
+    )
+
+
+# Streamed text is relayed in batches rather than per token: flush every
+# STREAM_FLUSH_DELTAS deltas or STREAM_FLUSH_SECONDS, whichever comes first.
+STREAM_FLUSH_DELTAS = 50
+STREAM_FLUSH_SECONDS = 0.1
+
+
+async def _stream_agent(
+    agent: Agent,
+    user_prompt: str,
+    result_key: str,
+    fallback: str,
+    max_turns: int = MAX_TURNS,
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    repo = payload.repo_slug
-    branch = payload.branch
+    Run `agent` in streaming mode and yield:
 
-    user_prompt = dedent(
-        f"""
+    - { "delta": "<text>" } as output text arrives (batched, see above)
+    - { "done": True, result_key: "<full markdown>" } once the run finishes
+
+    The final event is authoritative; on MaxTurnsExceeded it carries the
+    friendly fallback text instead of the model output.
+    """
+    result = Runner.run_streamed(agent, user_prompt, max_turns=max_turns)
+
+    buffer: List[str] = []
+    last_flush = time.monotonic()
+
+    try:
+        async for event in result.stream_events():
+            if event.type != "raw_response_event" or not isinstance(
+                event.data, ResponseTextDeltaEvent
+            ):
+                continue
+
+            buffer.append(event.data.delta)
+            now = time.monotonic()
+            if (
+                len(buffer) >= STREAM_FLUSH_DELTAS
+                or now - last_flush >= STREAM_FLUSH_SECONDS
+            ):
+                yield {"delta": "".join(buffer)}
+                buffer.clear()
+                last_flush = now
+    except MaxTurnsExceeded:
+        yield {"done": True, result_key: fallback}
+        return
+
+    if buffer:
+        yield {"delta": "".join(buffer)}
+    yield {"done": True, result_key: result.final_output}
+
+
+def _investigation_values(payload: ErrorInvestigationRequest) -> Dict[str, Any]:
+    return {
+        "repo": payload.repo_slug,
+        "branch": payload.branch,
+        "error_message": payload.error_message,
+        "github_run_id": payload.github_run_id or "None",
+        "workflow_name": payload.workflow_name or "None",
+        "file_path": payload.file_path or "None",
+        "ci_url": payload.ci_url or "None",
+        "max_runs_to_check": payload.max_runs_to_check,
+    }
+
+
+_INVESTIGATION_PROMPT = Template(
+    dedent(
+        """
         We have a CI / pipeline error to investigate.
 
         Error message:
-        \"\"\"{payload.error_message}\"\"\"
+        \"\"\"$error_message\"\"\"
 
-        Repository: {repo}
-        Branch: {branch}
+        Repository: $repo
+        Branch: $branch
 
         Additional context:
-        - GitHub Run ID (if provided): {payload.github_run_id or "None"}
-        - Workflow name (if provided): {payload.workflow_name or "None"}
-        - Suspected file path (if provided): {payload.file_path or "None"}
-        - CI URL (if provided): {payload.ci_url or "None"}
-        - Max runs to check: {payload.max_runs_to_check}
+        - GitHub Run ID (if provided): $github_run_id
+        - Workflow name (if provided): $workflow_name
+        - Suspected file path (if provided): $file_path
+        - CI URL (if provided): $ci_url
+        - Max runs to check: $max_runs_to_check
 
         Using the GitHub MCP tools, you should:
 
@@ -238,73 +325,244 @@ async def investigate_error(payload: ErrorInvestigationRequest) -> Dict[str, Any
         Include specific commit SHAs, filenames, workflow names, and PR numbers where relevant.
         """
     ).strip()
+)
+
+
+def _investigation_prompt(payload: ErrorInvestigationRequest) -> str:
+    return _INVESTIGATION_PROMPT.substitute(_investigation_values(payload))
+
+
+_INVESTIGATION_FALLBACK = Template(
+    dedent(
+        """
+        I attempted to investigate the error for:
+
+        - Repository: `$repo`
+        - Branch: `$branch`
+        - Error: `$error_message`
+
+        but I hit my internal step limit (too many back-and-forth steps between
+        the model and the GitHub MCP tools).
+
+        This usually means the GitHub MCP server isn't responding as expected
+        (e.g., auth, connectivity, or protocol issues), so I kept retrying
+        and eventually stopped.
+
+        Please double-check:
+
+        - That the GitHub MCP server is reachable and correctly configured.
+        - That `GITHUB_MCP_PAT` has the right scopes for this repo.
+        - That the repo slug and branch are correct.
+
+        Once those are confirmed, try the request again.
+        """
+    ).strip()
+)
+
+
+def _investigation_fallback(payload: ErrorInvestigationRequest) -> str:
+    return _INVESTIGATION_FALLBACK.substitute(_investigation_values(payload))
 
-    async with github_mcp_server() as server:
-        agent = create_error_investigator_agent(server)
+
+async def investigate_error(
+    payload: ErrorInvestigationRequest,
+    server: Optional[MCPServer] = None,
+) -> Dict[str, Any]:
+    """
+    High-level orchestration:
+
+    - Uses the given MCP server, or spins up a connection to GitHub
+    - Runs the agent with a rich prompt composed from payload
+    - Returns a dict ready to JSONify from FastAPI
+
+    Includes defensive handling around MaxTurnsExceeded so the API
+    returns a friendly message instead of a 500.
+    """
+    async with _mcp_session(server) as server:
+        agent = _agent_for(server, "error")
 
         try:
             # Give the agent a bit more room than the default to use tools and reason.
             result = await Runner.run(
                 agent,
-                user_prompt,
-                max_turns=20,
+                _investigation_prompt(payload),
+                max_turns=_investigation_turns(payload),
             )
             return {
                 "analysis_markdown": result.final_output,
             }
-
         except MaxTurnsExceeded:
             # Return a friendly explanation instead of letting FastAPI raise 500
-            fallback = dedent(
-                f"""
-                I attempted to investigate the error for:
+            return {
+                "analysis_markdown": _investigation_fallback(payload),
+            }
+
+
+async def investigate_error_stream(
+    payload: ErrorInvestigationRequest,
+    server: Optional[MCPServer] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant: yields {"delta": ...} chunks as the agent writes,
+    then a final {"done": True, "analysis_markdown": ...} event.
+    """
+    async with _mcp_session(server) as server:
+        async for event in _stream_agent(
+            _agent_for(server, "error"),
+            _investigation_prompt(payload),
+            result_key="analysis_markdown",
+            fallback=_investigation_fallback(payload),
+            max_turns=_investigation_turns(payload),
+        ):
+            yield event
+
+
+def _parse_batch_output(output: str, expected: int) -> Optional[List[str]]:
+    """
+    Pull the JSON array of per-error Markdown strings out of the model reply.
+
+    Returns None if the reply isn't a JSON array of `expected` strings.
+    """
+    start, end = output.find("["), output.rfind("]")
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        items = json.loads(output[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    if (
+        not isinstance(items, list)
+        or len(items) != expected
+        or not all(isinstance(item, str) for item in items)
+    ):
+        return None
+    return items
+
+
+_BATCH_ERROR_BLOCK = Template(
+    dedent(
+        """
+        ### Error $index
+        - Repository: $repo
+        - Branch: $branch
+        - GitHub Run ID (if provided): $github_run_id
+        - Workflow name (if provided): $workflow_name
+        - Suspected file path (if provided): $file_path
+        - CI URL (if provided): $ci_url
+        - Max runs to check: $max_runs_to_check
 
-                - Repository: `{repo}`
-                - Branch: `{branch}`
-                - Error: `{payload.error_message}`
+        Error message:
+        \"\"\"$error_message\"\"\"
+        """
+    ).strip()
+)
 
-                but I hit my internal step limit (too many back-and-forth steps between
-                the model and the GitHub MCP tools).
+_BATCH_PROMPT = Template(
+    dedent(
+        """
+        We have $count CI / pipeline errors to investigate.
+        Several may share a root cause; reuse evidence across them where it applies.
 
-                This usually means the GitHub MCP server isn't responding as expected
-                (e.g., auth, connectivity, or protocol issues), so I kept retrying
-                and eventually stopped.
+        $errors
 
-                Please double-check:
+        Using the GitHub MCP tools, investigate each error as you would a single one:
+        look up failing workflow runs and logs, recent commits touching related files,
+        and related PRs/issues, then infer the root cause and concrete fixes.
 
-                - That the GitHub MCP server is reachable and correctly configured.
-                - That `GITHUB_MCP_PAT` has the right scopes for this repo.
-                - That the repo slug and branch are correct.
+        For each error, write a Markdown analysis with these sections:
+        ## Summary, ## Likely causes, ## Evidence, ## Recommended fixes,
+        ## Recent repo activity (last few commits / PRs / issues).
 
-                Once those are confirmed, try the request again.
-                """
-            ).strip()
+        Reply with ONLY a JSON array of $count strings, where element i is the
+        Markdown analysis for Error i+1. No prose before or after the array.
+        """
+    ).strip()
+)
 
-            return {
-                "analysis_markdown": fallback,
-            }
+_BATCH_FALLBACK = dedent(
+    """
+    I attempted to investigate this error as part of a batch, but I hit
+    my internal step limit (too many back-and-forth steps between the
+    model and the GitHub MCP tools).
 
-async def summarize_repo_activity(payload: RepoActivityRequest) -> Dict[str, Any]:
+    Please double-check that the GitHub MCP server is reachable, that
+    `GITHUB_MCP_PAT` has the right scopes, and that the repo slug and
+    branch are correct, then retry (or send the error to /investigate).
     """
-    Summarize recent activity (commits, PRs, issues) for a given repo/branch.
+).strip()
+
+
+async def investigate_error_batch(
+    payloads: List[ErrorInvestigationRequest],
+    server: Optional[MCPServer] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Investigate several errors in a single agent run.
+
+    The system prompt (the bulk of the input tokens) is shared by the whole
+    batch instead of being re-sent once per error.
 
     Returns:
-    - { "activity_markdown": "<markdown summary>" }
+    - [ { "analysis_markdown": "<markdown analysis>" }, ... ] in input order
     """
-    repo = payload.repo_slug
-    branch = payload.branch
+    if not payloads:
+        return []
 
-    user_prompt = dedent(
-        f"""
+    errors_md = "\n\n".join(
+        _BATCH_ERROR_BLOCK.substitute(_investigation_values(payload), index=i)
+        for i, payload in enumerate(payloads, start=1)
+    )
+    user_prompt = _BATCH_PROMPT.substitute(count=len(payloads), errors=errors_md)
+
+    async with _mcp_session(server) as server:
+        agent = _agent_for(server, "error")
+
+        try:
+            result = await Runner.run(
+                agent,
+                user_prompt,
+                max_turns=min(
+                    MAX_TURNS,
+                    max(_investigation_turns(p) for p in payloads) + len(payloads),
+                ),
+            )
+        except MaxTurnsExceeded:
+            return [{"analysis_markdown": _BATCH_FALLBACK} for _ in payloads]
+
+    output = result.final_output
+    items = _parse_batch_output(output, len(payloads))
+    if items is None:
+        # Couldn't split the answer per error; hand everyone the whole thing
+        # rather than dropping it.
+        return [{"analysis_markdown": output} for _ in payloads]
+
+    return [{"analysis_markdown": item} for item in items]
+
+
+def _activity_values(payload: RepoActivityRequest) -> Dict[str, Any]:
+    return {
+        "repo": payload.repo_slug,
+        "branch": payload.branch,
+        "max_commits": payload.max_commits,
+        "max_prs": payload.max_prs,
+        "max_issues": payload.max_issues,
+    }
+
+
+_ACTIVITY_PROMPT = Template(
+    dedent(
+        """
         Summarize recent activity for this repository and branch.
 
-        Repository: {repo}
-        Branch: {branch}
+        Repository: $repo
+        Branch: $branch
 
         Activity limits:
-        - Max commits: {payload.max_commits}
-        - Max pull requests: {payload.max_prs}
-        - Max issues: {payload.max_issues}
+        - Max commits: $max_commits
+        - Max pull requests: $max_prs
+        - Max issues: $max_issues
 
         Using the GitHub MCP tools, you should:
         - List the most recent commits on this branch (up to max_commits).
@@ -313,12 +571,8 @@ async def summarize_repo_activity(payload: RepoActivityRequest) -> Dict[str, Any
         - Identify any themes (e.g., refactors, dependency updates, feature work).
         - Call out anything that looks risky or important (e.g., big changes,
           changes to critical paths, build pipeline modifications).
-        - Identify the **top 3 risky pull requests**, based on factors like:
-          - Size of the diff (files/lines changed).
-          - Touching critical code paths or infrastructure.
-          - Dependency / workflow / config changes.
-          - Mentions of breaking changes, migrations, or refactors.
-          - Association with failing builds or issues.
+        - Identify the **top 3 risky pull requests** using the PR risk signals
+          from your instructions.
 
         Return your answer in Markdown as:
 
@@ -344,48 +598,291 @@ async def summarize_repo_activity(payload: RepoActivityRequest) -> Dict[str, Any
         Include specific commit SHAs, PR numbers, and issue numbers where relevant.
         """
     ).strip()
+)
+
 
-    async with github_mcp_server() as server:
-        agent = create_repo_activity_agent(server)
+def _activity_prompt(payload: RepoActivityRequest) -> str:
+    return _ACTIVITY_PROMPT.substitute(_activity_values(payload))
+
+
+_ACTIVITY_FALLBACK = Template(
+    dedent(
+        """
+        I attempted to summarize recent activity for:
+
+        - Repository: `$repo`
+        - Branch: `$branch`
+
+        but I hit my internal step limit (too many back-and-forth steps
+        between the model and the GitHub MCP tools).
+
+        This usually means the GitHub MCP server isn't responding as expected
+        (e.g., auth, connectivity, or protocol issues).
+
+        Please verify:
+
+        - The GitHub MCP server / remote endpoint is reachable.
+        - `GITHUB_MCP_PAT` has the right scopes for this repo.
+        - The repo slug and branch are correct.
+
+        Once those are confirmed, try again.
+        """
+    ).strip()
+)
+
+
+def _activity_fallback(payload: RepoActivityRequest) -> str:
+    return _ACTIVITY_FALLBACK.substitute(_activity_values(payload))
+
+
+async def summarize_repo_activity(
+    payload: RepoActivityRequest,
+    server: Optional[MCPServer] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize recent activity (commits, PRs, issues) for a given repo/branch.
+
+    Returns:
+    - { "activity_markdown": "<markdown summary>" }
+    """
+    async with _mcp_session(server) as server:
+        agent = _agent_for(server, "activity")
 
         try:
             result = await Runner.run(
                 agent,
-                user_prompt,
-                max_turns=20,
+                _activity_prompt(payload),
+                max_turns=_activity_turns(payload),
             )
             return {
                 "activity_markdown": result.final_output,
             }
         except MaxTurnsExceeded:
-            fallback = dedent(
-                f"""
-                I attempted to summarize recent activity for:
+            # Return a friendly explanation instead of letting FastAPI raise 500
+            return {
+                "activity_markdown": _activity_fallback(payload),
+            }
+
 
-                - Repository: `{repo}`
-                - Branch: `{branch}`
+async def summarize_repo_activity_stream(
+    payload: RepoActivityRequest,
+    server: Optional[MCPServer] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant: yields {"delta": ...} chunks as the agent writes,
+    then a final {"done": True, "activity_markdown": ...} event.
+    """
+    async with _mcp_session(server) as server:
+        async for event in _stream_agent(
+            _agent_for(server, "activity"),
+            _activity_prompt(payload),
+            result_key="activity_markdown",
+            fallback=_activity_fallback(payload),
+            max_turns=_activity_turns(payload),
+        ):
+            yield event
+
+
+_DAILY_HEADER = Template(
+    dedent(
+        """
+        # Daily Report for `$repo` ($branch)
 
-                but I hit my internal step limit (too many back-and-forth steps
-                between the model and the GitHub MCP tools).
+        Generated by the GitHub Error Investigator + Activity Summary agent.
+        """
+    ).strip()
+)
 
-                This usually means the GitHub MCP server isn't responding as expected
-                (e.g., auth, connectivity, or protocol issues).
+_DAILY_ERROR_SECTION = Template(
+    dedent(
+        """
+        ## Error investigation
 
-                Please verify:
+        _Error message:_
 
-                - The GitHub MCP server / remote endpoint is reachable.
-                - `GITHUB_MCP_PAT` has the right scopes for this repo.
-                - The repo slug and branch are correct.
+        ```text
+        $error_message
+        ```
 
-                Once those are confirmed, try again.
-                """
-            ).strip()
+        $investigation_md
+        """
+    ).strip()
+)
+
+_DAILY_NO_ERROR_SECTION = dedent(
+    """
+    ## Error investigation
+
+    No specific error was provided for this report.
+    """
+).strip()
+
+_DAILY_ACTIVITY_SECTION = Template(
+    dedent(
+        """
+        ## Recent repo activity
+
+        $activity_md
+        """
+    ).strip()
+)
+
+
+def _daily_report_header(payload: DailyReportRequest) -> str:
+    return _DAILY_HEADER.substitute(repo=payload.repo_slug, branch=payload.branch)
+
+
+def _assemble_report(
+    repo: str,
+    branch: str,
+    activity_md: str,
+    investigation_md: str,
+    error_message: Optional[str],
+) -> str:
+    """
+    Pure helper that stitches the daily report sections together.
+    """
+    header = _DAILY_HEADER.substitute(repo=repo, branch=branch)
+
+    if error_message:
+        error_section = _DAILY_ERROR_SECTION.substitute(
+            error_message=error_message,
+            investigation_md=investigation_md or "No investigation details available.",
+        )
+    else:
+        error_section = _DAILY_NO_ERROR_SECTION
+
+    activity_section = _DAILY_ACTIVITY_SECTION.substitute(
+        activity_md=activity_md or "No activity details available.",
+    )
+
+    return "\n\n".join([header, error_section, activity_section])
+
+
+class _CoverageVerdict(BaseModel):
+    covered: bool
+    why: str
+
+
+_TRIAGE_INSTRUCTIONS = dedent(
+    """
+    You decide whether a repo activity summary already explains a CI error.
+    Answer covered=true only if the summary names a specific commit or PR
+    that plausibly caused the error. Keep `why` to one sentence.
+    """
+).strip()
+
+_TRIAGE_PROMPT = Template(
+    dedent(
+        """
+        Error message:
+        \"\"\"$error_message\"\"\"
+
+        Activity summary:
+        $activity_md
+        """
+    ).strip()
+)
+
+_REWRITE_INSTRUCTIONS = dedent(
+    """
+    You write short CI error investigations from an existing repo activity
+    summary; you have no tools. Use only facts from the summary.
+    """
+).strip()
+
+_REWRITE_PROMPT = Template(
+    dedent(
+        """
+        Error message:
+        \"\"\"$error_message\"\"\"
+
+        Why the activity summary explains it: $why
+
+        Activity summary:
+        $activity_md
+
+        In under 200 tokens of Markdown, give:
+        ## Summary, ## Likely causes, ## Evidence (commit SHAs / PR numbers),
+        ## Recommended fixes.
+        """
+    ).strip()
+)
+
+
+@functools.cache
+def _triage_agent() -> Agent:
+    return Agent(
+        name="daily-report-error-triage",
+        instructions=_TRIAGE_INSTRUCTIONS,
+        model="gpt-4.1-nano",
+        output_type=_CoverageVerdict,
+        model_settings=ModelSettings(temperature=0),
+    )
+
+
+@functools.cache
+def _rewrite_agent() -> Agent:
+    return Agent(
+        name="daily-report-error-rewrite",
+        instructions=_REWRITE_INSTRUCTIONS,
+        model="gpt-4.1-nano",
+        model_settings=ModelSettings(temperature=0.2, max_tokens=200),
+    )
 
-            return {
-                "activity_markdown": fallback,
-            }
 
-async def generate_daily_report(payload: DailyReportRequest) -> Dict[str, Any]:
+async def _maybe_skip_investigation(
+    activity_md: str,
+    error_message: str,
+    investigation: "asyncio.Task[Dict[str, Any]]",
+) -> Dict[str, Any]:
+    """
+    Ask a small model whether the activity summary already explains the
+    error. If it does, write the error section from the activity summary
+    and only then cancel the (still running) full investigation.
+
+    Any triage / rewrite failure falls back to the full investigation.
+    """
+    if investigation.done():
+        return investigation.result()
+
+    try:
+        triage = await Runner.run(
+            _triage_agent(),
+            _TRIAGE_PROMPT.substitute(
+                error_message=error_message, activity_md=activity_md
+            ),
+            max_turns=1,
+        )
+        verdict = triage.final_output
+        if not verdict.covered or investigation.done():
+            return await investigation
+
+        # The investigation keeps running during the rewrite, so it is still
+        # there to fall back on if the rewrite fails.
+        rewrite = await Runner.run(
+            _rewrite_agent(),
+            _REWRITE_PROMPT.substitute(
+                error_message=error_message,
+                why=verdict.why,
+                activity_md=activity_md,
+            ),
+            max_turns=1,
+        )
+    except Exception:
+        return await investigation
+
+    if investigation.done() and not investigation.exception():
+        # Finished during the rewrite: the full analysis is strictly better.
+        return investigation.result()
+    investigation.cancel()
+    return {"analysis_markdown": rewrite.final_output}
+
+
+async def generate_daily_report(
+    payload: DailyReportRequest,
+    server: Optional[MCPServer] = None,
+) -> Dict[str, Any]:
     """
     Generate a combined daily report for a repo/branch:
 
@@ -398,7 +895,6 @@ async def generate_daily_report(payload: DailyReportRequest) -> Dict[str, Any]:
     repo = payload.repo_slug
     branch = payload.branch
 
-    # 1) Always summarize repo activity
     activity_request = RepoActivityRequest(
         repo_slug=repo,
         branch=branch,
@@ -406,11 +902,7 @@ async def generate_daily_report(payload: DailyReportRequest) -> Dict[str, Any]:
         max_prs=payload.max_prs,
         max_issues=payload.max_issues,
     )
-    activity_result = await summarize_repo_activity(activity_request)
-    activity_md = activity_result.get("activity_markdown", "")
 
-    # 2) Optionally run error investigation
-    investigation_md = ""
     if payload.error_message:
         error_req = ErrorInvestigationRequest(
             error_message=payload.error_message,
@@ -422,69 +914,68 @@ async def generate_daily_report(payload: DailyReportRequest) -> Dict[str, Any]:
             ci_url=payload.ci_url,
             max_runs_to_check=payload.max_runs_to_check,
         )
-        investigation_result = await investigate_error(error_req)
-        investigation_md = investigation_result.get("analysis_markdown", "")
-
-    # 3) Combine into a single Markdown report
-    header = dedent(
-        f"""
-        # Daily Report for `{repo}` ({branch})
-
-        Generated by the GitHub Error Investigator + Activity Summary agent.
-        """
-    ).strip()
-
-    if payload.error_message:
-        error_section = dedent(
-            f"""
-            ## Error investigation
-
-            _Error message:_
-
-            ```text
-            {payload.error_message}
-            ```
-
-            {investigation_md or "No investigation details available."}
-            """
-        ).strip()
-    else:
-        error_section = dedent(
-            """
-            ## Error investigation
-
-            No specific error was provided for this report.
-            """
-        ).strip()
 
-    activity_section = dedent(
-        f"""
-        ## Recent repo activity
-
-        {activity_md or "No activity details available."}
-        """
-    ).strip()
-
-    report_markdown = "\n\n".join([header, error_section, activity_section])
+    # 1) + 2) Activity summary (always) and error investigation (optional)
+    # are independent, so start both over one MCP connection. Once the
+    # activity summary is in, the investigation may be cut short if the
+    # summary already explains the error.
+    async with _mcp_session(server) as server:
+        investigation = (
+            asyncio.create_task(investigate_error(error_req, server))
+            if payload.error_message
+            else None
+        )
+        try:
+            activity_result = await summarize_repo_activity(activity_request, server)
+            activity_md = activity_result.get("activity_markdown", "")
+
+            investigation_md = ""
+            if investigation is not None:
+                investigation_result = await _maybe_skip_investigation(
+                    activity_md, payload.error_message, investigation
+                )
+                investigation_md = investigation_result.get("analysis_markdown", "")
+        finally:
+            if investigation is not None and not investigation.done():
+                investigation.cancel()
+
+    # 3) Combine into a single Markdown report. Agent output can run to
+    # tens of KB, so build it off the event loop.
+    report_markdown = await asyncio.to_thread(
+        _assemble_report,
+        payload.repo_slug,
+        payload.branch,
+        activity_md,
+        investigation_md,
+        payload.error_message,
+    )
 
     return {"report_markdown": report_markdown}
 
-async def analyze_pr_risk(payload: PRRiskRequest) -> Dict[str, Any]:
+
+async def generate_daily_report_stream(
+    payload: DailyReportRequest,
+    server: Optional[MCPServer] = None,
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    Analyze the risk profile of a single pull request.
+    Streaming variant of generate_daily_report.
 
-    Returns:
-    - { "pr_risk_markdown": "<markdown analysis>" }
+    The report is stitched together from two concurrent agent runs, so
+    there's no single token stream to relay; the header goes out right away
+    and the final event carries the full report.
     """
-    repo = payload.repo_slug
-    pr_number = payload.pr_number
+    yield {"delta": _daily_report_header(payload) + "\n\n"}
+
+    result = await generate_daily_report(payload, server)
+    yield {"done": True, **result}
 
-    user_prompt = dedent(
-        f"""
+_PR_RISK_PROMPT = Template(
+    dedent(
+        """
         Analyze the risk of the following pull request.
 
-        Repository: {repo}
-        Pull request number: {pr_number}
+        Repository: $repo
+        Pull request number: $pr_number
 
         Using the GitHub MCP tools, you should:
         - Fetch PR metadata (title, description, author, labels, status).
@@ -520,43 +1011,108 @@ async def analyze_pr_risk(payload: PRRiskRequest) -> Dict[str, Any]:
         Include the PR number and key file paths in your explanations.
         """
     ).strip()
+)
+
 
-    async with github_mcp_server() as server:
-        agent = create_pr_risk_agent(server)
+def _pr_risk_prompt(payload: PRRiskRequest) -> str:
+    return _PR_RISK_PROMPT.substitute(repo=payload.repo_slug, pr_number=payload.pr_number)
+
+
+_PR_RISK_FALLBACK = Template(
+    dedent(
+        """
+        I attempted to analyze the risk of:
+
+        - Repository: `$repo`
+        - Pull request: `#$pr_number`
+
+        but I hit my internal step limit (too many back-and-forth steps
+        between the model and the GitHub MCP tools).
+
+        This usually means the GitHub MCP server isn't responding as expected
+        (e.g., auth, connectivity, or protocol issues).
+
+        Please verify:
+
+        - The GitHub MCP server / remote endpoint is reachable.
+        - `GITHUB_MCP_PAT` has the right scopes for this repo.
+        - The repo slug and PR number are correct.
+
+        Once those are confirmed, try again.
+        """
+    ).strip()
+)
+
+
+def _pr_risk_fallback(payload: PRRiskRequest) -> str:
+    return _PR_RISK_FALLBACK.substitute(repo=payload.repo_slug, pr_number=payload.pr_number)
+
+
+async def analyze_pr_risk(
+    payload: PRRiskRequest,
+    server: Optional[MCPServer] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze the risk profile of a single pull request.
+
+    Returns:
+    - { "pr_risk_markdown": "<markdown analysis>" }
+    """
+    async with _mcp_session(server) as server:
+        agent = _agent_for(server, "pr_risk")
 
         try:
             result = await Runner.run(
                 agent,
-                user_prompt,
-                max_turns=20,
+                _pr_risk_prompt(payload),
+                max_turns=MAX_TURNS,
             )
             return {
                 "pr_risk_markdown": result.final_output,
             }
         except MaxTurnsExceeded:
-            fallback = dedent(
-                f"""
-                I attempted to analyze the risk of:
-
-                - Repository: `{repo}`
-                - Pull request: `#{pr_number}`
-
-                but I hit my internal step limit (too many back-and-forth steps
-                between the model and the GitHub MCP tools).
-
-                This usually means the GitHub MCP server isn't responding as expected
-                (e.g., auth, connectivity, or protocol issues).
-
-                Please verify:
+            # Return a friendly explanation instead of letting FastAPI raise 500
+            return {
+                "pr_risk_markdown": _pr_risk_fallback(payload),
+            }
 
-                - The GitHub MCP server / remote endpoint is reachable.
-                - `GITHUB_MCP_PAT` has the right scopes for this repo.
-                - The repo slug and PR number are correct.
 
-                Once those are confirmed, try again.
-                """
-            ).strip()
+async def analyze_pr_risk_stream(
+    payload: PRRiskRequest,
+    server: Optional[MCPServer] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant: yields {"delta": ...} chunks as the agent writes,
+    then a final {"done": True, "pr_risk_markdown": ...} event.
+    """
+    async with _mcp_session(server) as server:
+        async for event in _stream_agent(
+            _agent_for(server, "pr_risk"),
+            _pr_risk_prompt(payload),
+            result_key="pr_risk_markdown",
+            fallback=_pr_risk_fallback(payload),
+        ):
+            yield event
+
+
+# Batch job kind -> (runner, markdown key in the runner's result).
+_BATCH_JOBS = {
+    "investigate": (investigate_error, "analysis_markdown"),
+    "activity": (summarize_repo_activity, "activity_markdown"),
+    "pr_risk": (analyze_pr_risk, "pr_risk_markdown"),
+}
+
+
+async def run_batch_job(
+    job: BatchJob,
+    server: Optional[MCPServer] = None,
+) -> Dict[str, Any]:
+    """
+    Run one /batch job with the matching single-request runner.
 
-            return {
-                "pr_risk_markdown": fallback,
-            }
\ No newline at end of file
+    Returns:
+    - { "kind": ..., "markdown": ... }
+    """
+    runner, key = _BATCH_JOBS[job.kind]
+    result = await runner(job, server)
+    return {"kind": job.kind, "markdown": result[key]}
@@ -0,0 +1,39 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows bursts of up to `capacity` calls, refilling
+    at `rate_per_minute`. `acquire()` waits until a token is available.
+    A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        if rate_per_minute < 0:
+            raise ValueError("rate_per_minute must be >= 0 (0 means unlimited)")
+        self._unlimited = rate_per_minute == 0
+        self._rate = rate_per_minute / 60.0
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self._unlimited:
+            return
+        # The lock keeps waiters in FIFO order while one of them sleeps.
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
@@ -1,8 +1,14 @@
 # src/api/server.py
+import asyncio
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
 
 from agents import set_default_openai_key
 
@@ -10,11 +16,20 @@ from ..models.error_payload import ErrorInvestigationRequest
 from ..models.repo_activity_payload import RepoActivityRequest
 from ..models.daily_report_payload import DailyReportRequest
 from ..models.pr_risk_payload import PRRiskRequest
+from ..models.batch_payload import BatchRequest, InvestigateBatch
+from ..agent import github_http
+from ..agent.github_mcp import SharedGitHubMCPServer
 from ..agent.investigator import (
     investigate_error,
+    investigate_error_batch,
+    investigate_error_stream,
     summarize_repo_activity,
+    summarize_repo_activity_stream,
     generate_daily_report,
+    generate_daily_report_stream,
     analyze_pr_risk,
+    analyze_pr_risk_stream,
+    run_batch_job,
 )
 load_dotenv()
 
@@ -28,39 +43,261 @@ if not openai_api_key:
 set_default_openai_key(openai_api_key)
 # -------------------------------------------
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open one GitHub MCP connection for the lifetime of the app so endpoints
+    don't redo the HTTPS + MCP handshake and list_tools on every request.
+    """
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(github_http.aclose)
+        app.state.mcp_server = await stack.enter_async_context(
+            SharedGitHubMCPServer()
+        )
+        yield
+
+
 app = FastAPI(
     title="GitHub Error Investigator (MCP)",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
+# Admission control: at most MAX_INFLIGHT agent runs at once, with up to
+# MAX_QUEUED more waiting; beyond that, shed load with a 429.
+MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "16"))
+MAX_QUEUED = int(os.getenv("MAX_QUEUED", "32"))
+RETRY_AFTER_SECONDS = 30
+
+_LLM_SEM = asyncio.Semaphore(MAX_INFLIGHT)
+_admitted = 0  # runs holding or waiting for an LLM slot
+
+
+class _Reservation:
+    """
+    One admitted run's place in line, released exactly once: by _llm_slot()
+    when the run ends, or when the reservation is garbage collected because
+    the run never started (e.g. the client disconnected before Starlette
+    began iterating an SSE body).
+    """
+
+    __slots__ = ("_held",)
+
+    def __init__(self) -> None:
+        self._held = True
+
+    def release(self) -> None:
+        global _admitted
+        if self._held:
+            self._held = False
+            _admitted -= 1
+
+    def __del__(self) -> None:
+        self.release()
+
+
+def _check_capacity(runs: int = 1) -> List[_Reservation]:
+    """
+    Admit `runs` agent runs (all or none), or shed them with a 429.
+
+    The reservations are taken here, synchronously, so a burst arriving in
+    the same loop tick is counted before any of it starts running. Each
+    admitted run then passes its reservation to _llm_slot().
+    """
+    global _admitted
+    if _admitted + runs > MAX_INFLIGHT + MAX_QUEUED:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many investigations in progress; please retry shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    _admitted += runs
+    return [_Reservation() for _ in range(runs)]
+
+
+@asynccontextmanager
+async def _llm_slot(reservation: _Reservation) -> AsyncIterator[None]:
+    try:
+        async with _LLM_SEM:
+            yield
+    finally:
+        reservation.release()
+
+
+async def _run_limited(
+    reservation: _Reservation, coro_factory: Callable[[], Awaitable[Any]]
+) -> Any:
+    async with _llm_slot(reservation):
+        return await coro_factory()
+
+
+# In-flight (non-streaming) requests keyed by endpoint + request body, so
+# identical concurrent requests (dashboards, cron jobs) share one agent run.
+_INFLIGHT: Dict[Tuple[str, bytes], "asyncio.Task[Any]"] = {}
+
+
+def _flight_key(endpoint: str, payload: Any) -> Tuple[str, bytes]:
+    if isinstance(payload, BaseModel):
+        body = payload.model_dump(mode="json")
+    else:
+        body = [item.model_dump(mode="json") for item in payload]
+    return endpoint, orjson.dumps(body, option=orjson.OPT_SORT_KEYS)
+
+
+async def _singleflight(
+    key: Tuple[str, bytes], coro_factory: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Run `coro_factory()` once per key (inside an LLM slot); concurrent
+    callers with the same key await the same result without taking a slot.
+
+    The work runs in its own task (shielded per caller) so one client
+    disconnecting doesn't cancel it for everyone else.
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        (reservation,) = _check_capacity()
+        task = asyncio.create_task(_run_limited(reservation, coro_factory))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _sse(
+    events: AsyncIterator[Dict[str, Any]], reservation: _Reservation
+) -> AsyncIterator[bytes]:
+    """
+    Frame investigator stream events as Server-Sent Events.
+    """
+    async with _llm_slot(reservation):
+        async for event in events:
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+def _event_stream(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    # Shed load before the 200 goes out; the slot itself is held by _sse().
+    # If the body never starts, dropping the generator frees the reservation.
+    (reservation,) = _check_capacity()
+    return StreamingResponse(_sse(events, reservation), media_type="text/event-stream")
+
+
 @app.post("/investigate")
-async def investigate_endpoint(payload: ErrorInvestigationRequest):
-    result = await investigate_error(payload)
-    return JSONResponse(content=result)
+async def investigate_endpoint(
+    payload: ErrorInvestigationRequest, request: Request, stream: bool = False
+):
+    """
+    Investigate a CI / pipeline error.
+    With ?stream=true, returns an SSE stream of {"delta": ...} events
+    followed by a final {"done": true, "analysis_markdown": ...} event.
+    """
+    server = await request.app.state.mcp_server.acquire()
+    if stream:
+        return _event_stream(investigate_error_stream(payload, server))
+    result = await _singleflight(
+        _flight_key("/investigate", payload),
+        lambda: investigate_error(payload, server),
+    )
+    return result
+
+@app.post("/investigate/stream")
+async def investigate_stream_endpoint(
+    payload: ErrorInvestigationRequest, request: Request
+):
+    """
+    Same as /investigate?stream=true: an SSE stream of {"delta": ...} events
+    followed by a final {"done": true, "analysis_markdown": ...} event.
+    """
+    server = await request.app.state.mcp_server.acquire()
+    return _event_stream(investigate_error_stream(payload, server))
+
+@app.post("/investigate_batch")
+async def investigate_batch_endpoint(
+    payloads: InvestigateBatch, request: Request
+):
+    """
+    Investigate several errors in one agent run (shared prompt, one LLM loop).
+    Returns one result per input error, in order (at most MAX_BATCH_JOBS).
+    """
+    server = await request.app.state.mcp_server.acquire()
+    results = await _singleflight(
+        _flight_key("/investigate_batch", payloads),
+        lambda: investigate_error_batch(payloads, server),
+    )
+    return results
 
 @app.post("/activity")
-async def activity_endpoint(payload: RepoActivityRequest):
+async def activity_endpoint(
+    payload: RepoActivityRequest, request: Request, stream: bool = False
+):
     """
     Summarize recent repo activity (commits, PRs, issues) for a given repo/branch.
+    Supports ?stream=true (SSE), like /investigate.
     """
-    result = await summarize_repo_activity(payload)
-    return JSONResponse(content=result)
+    server = await request.app.state.mcp_server.acquire()
+    if stream:
+        return _event_stream(summarize_repo_activity_stream(payload, server))
+    result = await _singleflight(
+        _flight_key("/activity", payload),
+        lambda: summarize_repo_activity(payload, server),
+    )
+    return result
 
 @app.post("/daily_report")
-async def daily_report_endpoint(payload: DailyReportRequest):
+async def daily_report_endpoint(
+    payload: DailyReportRequest, request: Request, stream: bool = False
+):
     """
     Generate a combined daily report for a repo/branch:
     - Recent repo activity
     - Optional error investigation (if error_message provided)
+    Supports ?stream=true (SSE), like /investigate.
     """
-    result = await generate_daily_report(payload)
-    return JSONResponse(content=result)
+    server = await request.app.state.mcp_server.acquire()
+    if stream:
+        return _event_stream(generate_daily_report_stream(payload, server))
+    result = await _singleflight(
+        _flight_key("/daily_report", payload),
+        lambda: generate_daily_report(payload, server),
+    )
+    return result
 
 @app.post("/pr_risk")
-async def pr_risk_endpoint(payload: PRRiskRequest):
+async def pr_risk_endpoint(
+    payload: PRRiskRequest, request: Request, stream: bool = False
+):
     """
     Analyze the risk profile of a specific pull request.
+    Supports ?stream=true (SSE), like /investigate.
     """
-    result = await analyze_pr_risk(payload)
-    return JSONResponse(content=result)
\ No newline at end of file
+    server = await request.app.state.mcp_server.acquire()
+    if stream:
+        return _event_stream(analyze_pr_risk_stream(payload, server))
+    result = await _singleflight(
+        _flight_key("/pr_risk", payload),
+        lambda: analyze_pr_risk(payload, server),
+    )
+    return result
+
+@app.post("/batch")
+async def batch_endpoint(payload: BatchRequest, request: Request):
+    """
+    Run several investigate / activity / pr_risk jobs in one call; the jobs
+    run concurrently on the server. Returns {"results": [...]} in job order.
+    Each job is admitted and holds an LLM slot like a separate request.
+    """
+    server = await request.app.state.mcp_server.acquire()
+    reservations = _check_capacity(len(payload.jobs))
+    # Shielded like _singleflight, so a disconnecting client doesn't cancel
+    # the jobs for everyone sharing the running agents.
+    results = await asyncio.shield(
+        asyncio.gather(
+            *(
+                _run_limited(reservation, lambda job=job: run_batch_job(job, server))
+                for reservation, job in zip(reservations, payload.jobs)
+            )
+        )
+    )
+    return {"results": results}
@@ -0,0 +1,47 @@
+from typing import Annotated, List, Literal, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from .error_payload import ErrorInvestigationRequest
+from .repo_activity_payload import RepoActivityRequest
+from .pr_risk_payload import PRRiskRequest
+
+# Each job is a full agent run, so keep one request from fanning out unboundedly.
+MAX_BATCH_JOBS = 8
+
+
+class InvestigateJob(ErrorInvestigationRequest):
+    kind: Literal["investigate"]
+
+
+class ActivityJob(RepoActivityRequest):
+    kind: Literal["activity"]
+
+
+class PRRiskJob(PRRiskRequest):
+    kind: Literal["pr_risk"]
+
+
+BatchJob = Annotated[
+    Union[InvestigateJob, ActivityJob, PRRiskJob],
+    Field(discriminator="kind"),
+]
+
+
+# Body of /investigate_batch: several errors investigated in one agent run.
+InvestigateBatch = Annotated[
+    List[ErrorInvestigationRequest],
+    Field(min_length=1, max_length=MAX_BATCH_JOBS),
+]
+
+
+class BatchRequest(BaseModel):
+    """
+    Request body for running several jobs in one backend call.
+
+    - jobs: each job is a normal request body plus a "kind" of
+      "investigate", "activity" or "pr_risk" (at most MAX_BATCH_JOBS)
+    """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    jobs: List[BatchJob] = Field(min_length=1, max_length=MAX_BATCH_JOBS)
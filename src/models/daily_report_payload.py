@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class DailyReportRequest(BaseModel):
@@ -9,6 +9,8 @@ class DailyReportRequest(BaseModel):
     - Always summarizes repo activity.
     - Optionally includes an error investigation if error info is provided.
     """
+    model_config = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
     repo_slug: str           # e.g. "kknudson15/Agentic_AI"
     branch: str = "main"
 
@@ -17,10 +19,18 @@ class DailyReportRequest(BaseModel):
     workflow_name: Optional[str] = None
     github_run_id: Optional[int] = None
     file_path: Optional[str] = None
-    ci_url: Optional[HttpUrl] = None
+    ci_url: Optional[str] = None  # only echoed into the prompt
     max_runs_to_check: int = 3
 
     # Activity limits
     max_commits: int = 10
     max_prs: int = 5
-    max_issues: int = 5
\ No newline at end of file
+    max_issues: int = 5
+
+    @field_validator("ci_url")
+    @classmethod
+    def _check_ci_url(cls, value: Optional[str]) -> Optional[str]:
+        # Cheap sanity check instead of full HttpUrl parsing.
+        if value and not value.startswith(("http://", "https://")):
+            raise ValueError("ci_url must start with http:// or https://")
+        return value
@@ -1,13 +1,23 @@
 from typing import Optional
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class ErrorInvestigationRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
     error_message: str
     repo_slug: str  # e.g. "org/repo"
     branch: str = "main"
     workflow_name: Optional[str] = None
     github_run_id: Optional[int] = None
     file_path: Optional[str] = None
-    ci_url: Optional[HttpUrl] = None
-    max_runs_to_check: int = 5
\ No newline at end of file
+    ci_url: Optional[str] = None  # only echoed into the prompt
+    max_runs_to_check: int = 5
+
+    @field_validator("ci_url")
+    @classmethod
+    def _check_ci_url(cls, value: Optional[str]) -> Optional[str]:
+        # Cheap sanity check instead of full HttpUrl parsing.
+        if value and not value.startswith(("http://", "https://")):
+            raise ValueError("ci_url must start with http:// or https://")
+        return value
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class PRRiskRequest(BaseModel):
@@ -8,5 +8,7 @@ class PRRiskRequest(BaseModel):
     - repo_slug: "owner/repo"
     - pr_number: GitHub pull request number
     """
+    model_config = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
     repo_slug: str        # e.g. "kknudson15/Agentic_AI"
     pr_number: int
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class RepoActivityRequest(BaseModel):
@@ -9,6 +9,8 @@ class RepoActivityRequest(BaseModel):
     - branch: optional, defaults to "main"
     - max_* fields: how much to pull in each category
     """
+    model_config = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
     repo_slug: str          # e.g. "kknudson15/Agentic_AI"
     branch: str = "main"
     max_commits: int = 10
@@ -1,21 +1,261 @@
 import os
-import asyncio
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
 
+import httpx
+import orjson
 import streamlit as st
-import requests
-from dotenv import load_dotenv
 
-# Load env so we can default the API base URL if needed
-load_dotenv()
 
-API_BASE_URL = os.getenv("INVESTIGATOR_API_BASE_URL", "http://localhost:8000")
+@st.cache_resource
+def _env() -> str:
+    """
+    Load .env once per process (not on every rerun) and resolve the
+    default API base URL, without a trailing slash.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("INVESTIGATOR_API_BASE_URL", "http://localhost:8000").rstrip("/")
+
+
+API_BASE_URL = _env()
+
+
+# Read timeouts per endpoint, so cheap calls fail fast on a stalled backend.
+# Non-streamed responses send nothing until the agent run finishes, so the
+# read timeout is effectively the whole run. For the SSE stream it bounds the
+# silence between events (e.g. a slow tool call); STREAM_DEADLINE_SECONDS
+# bounds the whole stream.
+CONNECT_TIMEOUT_SECONDS = 5.0
+STREAM_DEADLINE_SECONDS = 300.0
+ENDPOINT_TIMEOUTS = {
+    "/activity": httpx.Timeout(60.0, connect=CONNECT_TIMEOUT_SECONDS),
+    "/investigate/stream": httpx.Timeout(90.0, connect=CONNECT_TIMEOUT_SECONDS),
+    "/pr_risk": httpx.Timeout(90.0, connect=CONNECT_TIMEOUT_SECONDS),
+    "/daily_report": httpx.Timeout(180.0, connect=CONNECT_TIMEOUT_SECONDS),
+}
+
+
+@st.cache_resource
+def _get_client() -> httpx.Client:
+    """
+    One pooled HTTP/2 client for the life of the Streamlit process, so repeat
+    calls to the backend share a keep-alive connection (multiplexed when the
+    backend or its proxy speaks HTTP/2).
+    """
+    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    return httpx.Client(
+        # retries= only covers connection failures, not HTTP status codes.
+        transport=httpx.HTTPTransport(http2=True, limits=limits, retries=2),
+        timeout=httpx.Timeout(120.0, connect=CONNECT_TIMEOUT_SECONDS),
+        headers={"User-Agent": "investigator-streamlit/1.0", "Accept": "application/json"},
+    )
+
+
+# Transient backend failures (overload, proxy hiccups) are retried here with
+# backoff, rather than by the user clicking Run again.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+MAX_RETRY_AFTER_SECONDS = 30.0
 
 
-def call_api(path: str, payload: dict) -> dict:
-    url = f"{API_BASE_URL.rstrip('/')}{path}"
-    resp = requests.post(url, json=payload, timeout=120)
+def _retry_delay(resp: httpx.Response, attempt: int) -> float:
+    retry_after = resp.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+    return RETRY_BACKOFF_SECONDS * 2**attempt
+
+
+def _send(request: httpx.Request, stream: bool = False) -> httpx.Response:
+    """
+    Send `request`, retrying RETRY_STATUSES with exponential backoff (or the
+    server's Retry-After). The last response is returned as-is.
+    """
+    client = _get_client()
+    for attempt in range(MAX_RETRIES + 1):
+        resp = client.send(request, stream=stream)
+        if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return resp
+        resp.close()
+        time.sleep(_retry_delay(resp, attempt))
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, httpx.TimeoutException):
+        return "The backend took too long to respond. Please try again in a moment."
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status == 429:
+            return "The backend is busy with other investigations. Please retry shortly."
+        return f"Backend returned HTTP {status}: {exc.response.text[:500]}"
+    return f"Request failed: {exc}"
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# Request bodies, one per backend endpoint. Field order is the JSON key order,
+# so encoding the same inputs always yields the same bytes (and cache key).
+@dataclass(slots=True, frozen=True)
+class InvestigatePayload:
+    error_message: str
+    repo_slug: str
+    branch: str
+    workflow_name: Optional[str]
+    github_run_id: Optional[int]
+    ci_url: Optional[str]
+    max_runs_to_check: int
+
+
+@dataclass(slots=True, frozen=True)
+class ActivityPayload:
+    repo_slug: str
+    branch: str
+    max_commits: int
+    max_prs: int
+    max_issues: int
+
+
+@dataclass(slots=True, frozen=True)
+class DailyReportPayload:
+    repo_slug: str
+    branch: str
+    error_message: Optional[str]
+    workflow_name: Optional[str]
+    github_run_id: Optional[int]
+    ci_url: Optional[str]
+    max_runs_to_check: int
+    max_commits: int
+    max_prs: int
+    max_issues: int
+
+
+@dataclass(slots=True, frozen=True)
+class PRRiskPayload:
+    repo_slug: str
+    pr_number: int
+
+
+def _encode(payload: Any) -> bytes:
+    return orjson.dumps(asdict(payload))
+
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def call_api(path: str, body: bytes, base_url: str) -> dict:
+    """
+    POST `body` (already-encoded JSON, so it can be part of the cache key)
+    to the backend. Identical (base_url, path, body) calls within
+    5 minutes return the cached response instead of re-running the agents.
+    """
+    request = _get_client().build_request(
+        "POST",
+        f"{base_url}{path}",
+        content=body,
+        headers=JSON_HEADERS,
+        timeout=ENDPOINT_TIMEOUTS.get(path, httpx.USE_CLIENT_DEFAULT),
+    )
+    resp = _send(request)
     resp.raise_for_status()
-    return resp.json()
+    # Daily reports can run to hundreds of KB of markdown.
+    return orjson.loads(resp.content)
+
+
+def stream_api(
+    path: str, body: bytes, base_url: str, final: Dict[str, Any]
+) -> Iterator[str]:
+    """
+    POST `body` to an SSE endpoint and yield the text deltas as they
+    arrive. The closing {"done": true, ...} event is copied into `final`:
+    its markdown is authoritative (e.g. the max-turns fallback text).
+    """
+    request = _get_client().build_request(
+        "POST",
+        f"{base_url}{path}",
+        content=body,
+        headers=JSON_HEADERS,
+        timeout=ENDPOINT_TIMEOUTS.get(path, httpx.USE_CLIENT_DEFAULT),
+    )
+    deadline = time.monotonic() + STREAM_DEADLINE_SECONDS
+    resp = _send(request, stream=True)
+    try:
+        if resp.is_error:
+            resp.read()  # so _error_message can show the body
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            # Checked per line; the read timeout covers a fully stalled stream.
+            if time.monotonic() > deadline:
+                raise httpx.ReadTimeout("stream deadline exceeded", request=request)
+            if not line.startswith("data: "):
+                continue
+            event = orjson.loads(line[len("data: "):])
+            if event.get("done"):
+                final.update(event)
+            elif "delta" in event:
+                yield event["delta"]
+    finally:
+        resp.close()
+
+
+def _lock_form(tab: str) -> None:
+    st.session_state[f"{tab}_busy"] = True
+
+
+def _submit_button(label: str, tab: str) -> bool:
+    """
+    Form submit button that stays disabled while the tab's request runs.
+    on_click fires before the rerun, so the run that sends the request
+    already renders the button disabled and a second click can't be sent.
+
+    Returns True when a submit is pending, i.e. this run should send it.
+    """
+    busy = st.session_state.get(f"{tab}_busy", False)
+    st.form_submit_button(
+        label,
+        type="primary",
+        on_click=_lock_form,
+        args=(tab,),
+        disabled=busy,
+    )
+    return busy
+
+
+@contextmanager
+def _busy(tab: str) -> Iterator[None]:
+    """
+    Wrap a tab's request: on the way out, unlock its form and rerun so the
+    button is enabled again. A failure is kept in "<tab>_failure" so the
+    rerun can still show it ("<tab>_error" is taken by the error widgets).
+    """
+    st.session_state.pop(f"{tab}_failure", None)
+    try:
+        yield
+    except Exception as e:
+        st.session_state[f"{tab}_failure"] = _error_message(e)
+    finally:
+        st.session_state[f"{tab}_busy"] = False
+    st.rerun()
+
+
+def _show_result(tab: str) -> None:
+    # Rendered outside the submit guard so results survive reruns.
+    if error := st.session_state.get(f"{tab}_failure"):
+        st.error(error)
+    if md := st.session_state.get(f"{tab}_result_md"):
+        st.markdown(md)
+
+
+def _opt_int(value: str) -> Optional[int]:
+    value = value.strip()
+    return int(value) if value else None
+
+
+def _is_opt_int(value: str) -> bool:
+    value = value.strip()
+    return not value or value.isdigit()
 
 
 # ---------- Streamlit UI ----------
@@ -40,10 +280,20 @@ with st.sidebar:
     st.write("Backend base URL:")
     api_url_input = st.text_input("API Base URL", API_BASE_URL)
     if api_url_input:
-        API_BASE_URL = api_url_input
+        # Normalised here so call_api's cache key doesn't depend on a trailing slash.
+        API_BASE_URL = api_url_input.rstrip("/")
 
     st.caption("Make sure your FastAPI server is running on this URL.")
 
+    st.header("Repository")
+    # Shared by every tab via session_state.
+    st.text_input("Repo slug (owner/repo)", "kknudson15/Agentic_AI", key="repo_slug")
+    st.text_input("Branch", "main", key="branch")
+
+    if st.button("Clear cache", key="clear_cache"):
+        st.cache_data.clear()
+        st.caption("Cached responses cleared.")
+
 st.divider()
 
 tab_investigate, tab_activity, tab_daily, tab_pr = st.tabs(
@@ -54,140 +304,162 @@ tab_investigate, tab_activity, tab_daily, tab_pr = st.tabs(
 with tab_investigate:
     st.subheader("Error investigation")
 
-    repo_slug = st.text_input("Repo slug (owner/repo)", "kknudson15/Agentic_AI", key="inv_repo")
-    branch = st.text_input("Branch", "main", key="inv_branch")
-    error_message = st.text_area(
-        "Error message / stack trace",
-        "ModuleNotFoundError: No module named 'my_pipeline.config'",
-        height=150,
-        key="inv_error",
-    )
-    workflow_name = st.text_input("Workflow name (optional)", "", key="inv_workflow")
-    github_run_id = st.text_input("GitHub run ID (optional)", "", key="inv_runid")
-    ci_url = st.text_input("CI URL (optional)", "", key="inv_ciurl")
-
-    max_runs_to_check = st.slider("Max runs to check", 1, 10, 3, key="inv_max_runs")
-
-    if st.button("Run investigation", type="primary", key="inv_button"):
-        payload = {
-            "error_message": error_message,
-            "repo_slug": repo_slug,
-            "branch": branch,
-            "workflow_name": workflow_name or None,
-            "github_run_id": int(github_run_id) if github_run_id.strip() else None,
-            "ci_url": ci_url or None,
-            "max_runs_to_check": max_runs_to_check,
-        }
-
-        with st.spinner("Investigating error..."):
-            try:
-                resp = call_api("/investigate", payload)
-                st.markdown(resp.get("analysis_markdown", "_No analysis returned._"))
-            except Exception as e:
-                st.error(f"Request failed: {e}")
+    with st.form("inv_form", clear_on_submit=False):
+        error_message = st.text_area(
+            "Error message / stack trace",
+            "ModuleNotFoundError: No module named 'my_pipeline.config'",
+            height=150,
+            key="inv_error",
+        )
+        workflow_name = st.text_input("Workflow name (optional)", "", key="inv_workflow")
+        github_run_id = st.text_input("GitHub run ID (optional)", "", key="inv_runid")
+        ci_url = st.text_input("CI URL (optional)", "", key="inv_ciurl")
+
+        max_runs_to_check = st.slider("Max runs to check", 1, 10, 3, key="inv_max_runs")
+
+        submitted = _submit_button("Run investigation", "inv")
+
+    if submitted:
+        with _busy("inv"):
+            if not _is_opt_int(github_run_id):
+                st.session_state["inv_failure"] = "GitHub run ID must be a number."
+            else:
+                body = _encode(
+                    InvestigatePayload(
+                        error_message=error_message,
+                        repo_slug=st.session_state.repo_slug,
+                        branch=st.session_state.branch,
+                        workflow_name=workflow_name or None,
+                        github_run_id=_opt_int(github_run_id),
+                        ci_url=ci_url or None,
+                        max_runs_to_check=max_runs_to_check,
+                    )
+                )
+
+                # Show the analysis as it is written; the rerun after it
+                # finishes renders the final markdown from the "done" event.
+                final: Dict[str, Any] = {}
+                st.write_stream(
+                    stream_api("/investigate/stream", body, API_BASE_URL, final)
+                )
+                st.session_state["inv_result_md"] = final.get(
+                    "analysis_markdown", "_No analysis returned._"
+                )
+
+    _show_result("inv")
 
 # --- Tab 2: Repo activity ---
 with tab_activity:
     st.subheader("Recent repo activity")
 
-    repo_slug_a = st.text_input("Repo slug (owner/repo)", "kknudson15/Agentic_AI", key="act_repo")
-    branch_a = st.text_input("Branch", "main", key="act_branch")
-
-    max_commits = st.slider("Max commits", 1, 50, 10, key="act_commits")
-    max_prs = st.slider("Max PRs", 0, 20, 5, key="act_prs")
-    max_issues = st.slider("Max issues", 0, 20, 5, key="act_issues")
-
-    if st.button("Summarize activity", type="primary", key="act_button"):
-        payload = {
-            "repo_slug": repo_slug_a,
-            "branch": branch_a,
-            "max_commits": max_commits,
-            "max_prs": max_prs,
-            "max_issues": max_issues,
-        }
-
-        with st.spinner("Summarizing activity..."):
-            try:
-                resp = call_api("/activity", payload)
-                st.markdown(resp.get("activity_markdown", "_No activity summary returned._"))
-            except Exception as e:
-                st.error(f"Request failed: {e}")
+    with st.form("act_form", clear_on_submit=False):
+        max_commits = st.slider("Max commits", 1, 50, 10, key="act_commits")
+        max_prs = st.slider("Max PRs", 0, 20, 5, key="act_prs")
+        max_issues = st.slider("Max issues", 0, 20, 5, key="act_issues")
+
+        submitted = _submit_button("Summarize activity", "act")
+
+    if submitted:
+        body = _encode(
+            ActivityPayload(
+                repo_slug=st.session_state.repo_slug,
+                branch=st.session_state.branch,
+                max_commits=max_commits,
+                max_prs=max_prs,
+                max_issues=max_issues,
+            )
+        )
+
+        with _busy("act"), st.spinner("Summarizing activity..."):
+            resp = call_api("/activity", body, API_BASE_URL)
+            st.session_state["act_result_md"] = resp.get(
+                "activity_markdown", "_No activity summary returned._"
+            )
+
+    _show_result("act")
 
 # --- Tab 3: Daily report ---
 with tab_daily:
     st.subheader("Daily report")
 
-    repo_slug_d = st.text_input("Repo slug (owner/repo)", "kknudson15/Agentic_AI", key="daily_repo")
-    branch_d = st.text_input("Branch", "main", key="daily_branch")
-
-    st.markdown("**Optional error context** (include to add an investigation section):")
-    error_message_d = st.text_area(
-        "Error message / stack trace (optional)",
-        "",
-        height=120,
-        key="daily_error",
-    )
-    workflow_name_d = st.text_input("Workflow name (optional)", "", key="daily_workflow")
-    github_run_id_d = st.text_input("GitHub run ID (optional)", "", key="daily_runid")
-    ci_url_d = st.text_input("CI URL (optional)", "", key="daily_ciurl")
-    max_runs_to_check_d = st.slider("Max runs to check", 1, 10, 3, key="daily_max_runs")
-
-    st.markdown("**Activity limits**:")
-    max_commits_d = st.slider("Max commits", 1, 50, 10, key="daily_commits")
-    max_prs_d = st.slider("Max PRs", 0, 20, 5, key="daily_prs")
-    max_issues_d = st.slider("Max issues", 0, 20, 5, key="daily_issues")
-
-    if st.button("Generate daily report", type="primary", key="daily_button"):
-        payload = {
-            "repo_slug": repo_slug_d,
-            "branch": branch_d,
-            "error_message": error_message_d or None,
-            "workflow_name": workflow_name_d or None,
-            "github_run_id": int(github_run_id_d) if github_run_id_d.strip() else None,
-            "ci_url": ci_url_d or None,
-            "max_runs_to_check": max_runs_to_check_d,
-            "max_commits": max_commits_d,
-            "max_prs": max_prs_d,
-            "max_issues": max_issues_d,
-        }
-
-        with st.spinner("Generating daily report..."):
-            try:
-                resp = call_api("/daily_report", payload)
-                st.markdown(resp.get("report_markdown", "_No report returned._"))
-            except Exception as e:
-                st.error(f"Request failed: {e}")
+    with st.form("daily_form", clear_on_submit=False):
+        st.markdown("**Optional error context** (include to add an investigation section):")
+        error_message_d = st.text_area(
+            "Error message / stack trace (optional)",
+            "",
+            height=120,
+            key="daily_error",
+        )
+        workflow_name_d = st.text_input("Workflow name (optional)", "", key="daily_workflow")
+        github_run_id_d = st.text_input("GitHub run ID (optional)", "", key="daily_runid")
+        ci_url_d = st.text_input("CI URL (optional)", "", key="daily_ciurl")
+        max_runs_to_check_d = st.slider("Max runs to check", 1, 10, 3, key="daily_max_runs")
+
+        st.markdown("**Activity limits**:")
+        max_commits_d = st.slider("Max commits", 1, 50, 10, key="daily_commits")
+        max_prs_d = st.slider("Max PRs", 0, 20, 5, key="daily_prs")
+        max_issues_d = st.slider("Max issues", 0, 20, 5, key="daily_issues")
+
+        submitted = _submit_button("Generate daily report", "daily")
+
+    if submitted:
+        with _busy("daily"):
+            if not _is_opt_int(github_run_id_d):
+                st.session_state["daily_failure"] = "GitHub run ID must be a number."
+            else:
+                payload = DailyReportPayload(
+                    repo_slug=st.session_state.repo_slug,
+                    branch=st.session_state.branch,
+                    error_message=error_message_d or None,
+                    workflow_name=workflow_name_d or None,
+                    github_run_id=_opt_int(github_run_id_d),
+                    ci_url=ci_url_d or None,
+                    max_runs_to_check=max_runs_to_check_d,
+                    max_commits=max_commits_d,
+                    max_prs=max_prs_d,
+                    max_issues=max_issues_d,
+                )
+                body = _encode(payload)
+
+                with st.spinner("Generating daily report..."):
+                    # The backend runs the investigation and activity halves
+                    # concurrently (and may skip the investigation entirely).
+                    resp = call_api("/daily_report", body, API_BASE_URL)
+                st.session_state["daily_result_md"] = resp.get(
+                    "report_markdown", "_No report returned._"
+                )
+
+    _show_result("daily")
 
 # --- Tab 4: PR risk analysis ---
 with tab_pr:
     st.subheader("PR risk analysis")
 
-    repo_slug_pr = st.text_input(
-        "Repo slug (owner/repo)",
-        "kknudson15/Agentic_AI",
-        key="pr_repo",
-    )
-    pr_number_str = st.text_input(
-        "Pull request number",
-        "",
-        key="pr_number",
-        placeholder="e.g. 12",
-    )
-
-    if st.button("Analyze PR risk", type="primary", key="pr_button"):
-        if not pr_number_str.strip().isdigit():
-            st.error("Please enter a valid numeric PR number.")
-        else:
-            payload = {
-                "repo_slug": repo_slug_pr,
-                "pr_number": int(pr_number_str.strip()),
-            }
-
-            with st.spinner("Analyzing PR risk..."):
-                try:
-                    resp = call_api("/pr_risk", payload)
-                    st.markdown(
-                        resp.get("pr_risk_markdown", "_No PR analysis returned._")
+    with st.form("pr_form", clear_on_submit=False):
+        pr_number_str = st.text_input(
+            "Pull request number",
+            "",
+            key="pr_number",
+            placeholder="e.g. 12",
+        )
+
+        submitted = _submit_button("Analyze PR risk", "pr")
+
+    if submitted:
+        with _busy("pr"):
+            if not pr_number_str.strip().isdigit():
+                st.session_state["pr_failure"] = "Please enter a valid numeric PR number."
+            else:
+                body = _encode(
+                    PRRiskPayload(
+                        repo_slug=st.session_state.repo_slug,
+                        pr_number=int(pr_number_str.strip()),
                     )
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
\ No newline at end of file
+                )
+                with st.spinner("Analyzing PR risk..."):
+                    resp = call_api("/pr_risk", body, API_BASE_URL)
+                st.session_state["pr_result_md"] = resp.get(
+                    "pr_risk_markdown", "_No PR analysis returned._"
+                )
+
+    _show_result("pr")